@@ -0,0 +1,48 @@
+"""
+TITLE:          Checkpoints
+
+DESCRIPTION:    Saves the state of long-running operations (like a search that
+                    is placing results) in the `checkpoints` folder of the
+                    installation directory, so that an operation interrupted
+                    by Ctrl+C, a crash, or a sleeping computer can be resumed
+                    later. Each checkpoint is a small JSON file, replaced in
+                    one step whenever it is saved.
+
+AUTHOR:         Benjamin Whitsett
+MODIFIED:       Oct. 19, 2026
+"""
+
+import os
+import json
+
+CHECKPOINT_DIR_LOC = os.path.join(os.path.split(__file__)[0], 'checkpoints')
+
+# location of a named checkpoint
+def checkpointPath(name):
+    return os.path.join(CHECKPOINT_DIR_LOC, name + '.json')
+
+# save the state of an operation under a name
+def save(name, state):
+    try:
+        os.mkdir(CHECKPOINT_DIR_LOC)
+    except FileExistsError:
+        pass
+    path = checkpointPath(name)
+    with open(path + '.tmp', 'w', encoding='utf-8') as fout:
+        json.dump(state, fout)
+    os.replace(path + '.tmp', path)
+
+# load the saved state of an operation, or None if there is none (or it is unreadable)
+def load(name):
+    try:
+        with open(checkpointPath(name), 'r', encoding='utf-8') as fin:
+            return json.load(fin)
+    except (OSError, ValueError):
+        return None
+
+# forget the saved state of a finished operation
+def clear(name):
+    try:
+        os.remove(checkpointPath(name))
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,93 @@
+"""
+TITLE:          Near-Duplicate Finder
+
+DESCRIPTION:    Computes perceptual hashes of images and groups images whose
+                    hashes are close, to find re-imported copies and format
+                    conversions of the same photo. Hashes are 64-bit difference
+                    hashes of a tiny grayscale version of the image, decoded
+                    at reduced size where the format allows it. Close hashes
+                    are found by multi-index hashing instead of comparing
+                    every pair: the bits are split into a few blocks, each
+                    indexed by its exact value, and two hashes within
+                    MAX_DISTANCE bits must nearly agree on at least one block,
+                    so only images found by looking up those block values are
+                    compared.
+                    Each group is anchored to a seed image, so similar images
+                    cannot chain together into one large group.
+
+AUTHOR:         Benjamin Whitsett
+MODIFIED:       Oct. 19, 2026
+"""
+
+from PIL import Image, ImageOps
+
+HASH_DECODE_SIZE = 64   # smallest size requested from the decoder before hashing
+HASH_WIDTH = 8          # hash is HASH_WIDTH x HASH_WIDTH bits
+MAX_DISTANCE = 6        # largest number of differing bits for two images to count as duplicates
+HASH_BLOCKS = 4         # blocks the hash is split into for finding close hashes
+
+# 64-bit difference hash of an image (None if it cannot be read)
+def perceptualHash(path):
+    try:
+        with Image.open(path) as img:
+            img.draft('L', (HASH_DECODE_SIZE, HASH_DECODE_SIZE)) # JPEG decodes at up to 1/8 scale
+            img = ImageOps.exif_transpose(img.convert('L'))
+            img = img.resize((HASH_WIDTH + 1, HASH_WIDTH), Image.BOX)
+            pixels = list(img.getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(HASH_WIDTH):
+        for col in range(HASH_WIDTH):
+            left = pixels[row * (HASH_WIDTH + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (HASH_WIDTH + 1) + col + 1])
+    return bits
+
+# number of differing bits between two hashes
+def hashDistance(a, b):
+    return (a ^ b).bit_count()
+
+# (shift, mask) of each of `count` disjoint blocks of near-equal size covering the hash bits
+def hashBlocks(count):
+    bits = HASH_WIDTH * HASH_WIDTH
+    bounds = [k * bits // count for k in range(count + 1)]
+    return [(start, (1 << (end - start)) - 1) for start, end in zip(bounds, bounds[1:])]
+
+# every value with at most `radius` bits set among the lowest `width` bits (0 first)
+def flipMasks(width, radius):
+    masks = [0]
+    for _ in range(radius):
+        masks = sorted(set(masks) | {m | (1 << b) for m in masks for b in range(width)})
+    return masks
+
+# group item indices around seeds: each seed (the first ungrouped item, in index order) is grouped with every
+#  other ungrouped item within `radius` bits of it, so no member is further than `radius` from its seed;
+#  returns groups of two or more indices, seed first and the rest in index order (items with no hash are skipped)
+def findGroups(hashes, radius=MAX_DISTANCE):
+    # one table per block, from the exact block value to the items having it; two hashes within `radius` bits
+    #  differ by at most radius // HASH_BLOCKS bits in at least one block, so only those block values are probed
+    blocks = hashBlocks(HASH_BLOCKS)
+    probes = [flipMasks(mask.bit_length(), radius // HASH_BLOCKS) for _, mask in blocks]
+    tables = [{} for _ in blocks]
+    for i, h in enumerate(hashes):
+        if h is not None:
+            for table, (shift, mask) in zip(tables, blocks):
+                table.setdefault((h >> shift) & mask, []).append(i)
+
+    # seeds and grouped items are done, and are never considered again
+    done = set()
+    groups = []
+    for i, h in enumerate(hashes):
+        if h is None or i in done:
+            continue
+        candidates = set()
+        for table, (shift, mask), flips in zip(tables, blocks, probes):
+            value = (h >> shift) & mask
+            for flip in flips:
+                candidates.update(table.get(value ^ flip, ()))
+        candidates -= done
+        group = sorted(j for j in candidates if hashDistance(h, hashes[j]) <= radius) # includes the seed
+        done.update(group)
+        if len(group) > 1:
+            groups.append(group)
+    return groups
@@ -4,12 +4,14 @@ TITLE:          EXIF File Handler
 DESCRIPTION:    Provides utility functions for interaction with image files'
                     EXIF data. Titles are stored under XPTitle and tags are
                     stored under XPSubject, and are separated by semicolons
-                    (and, optionally, whitespace around the semicolons). Ties to
+                    (and, optionally, whitespace around the semicolons).
+                    Capture date, pixel dimensions, camera model, and GPS
+                    position can be read alongside them. Ties to
                     `viewer.py` are also provided for controlling a separate
                     preview process.
 
 AUTHOR:         Benjamin Whitsett
-MODIFIED:       Mar. 26, 2026
+MODIFIED:       Oct. 19, 2026
 """
 
 import pyexiv2
@@ -21,6 +23,17 @@ import re
 
 TITLE_LOC = 'Exif.Image.XPTitle'
 TAG_LOC = 'Exif.Image.XPSubject'
+DATE_LOC = 'Exif.Photo.DateTimeOriginal'
+MODEL_LOC = 'Exif.Image.Model'
+WIDTH_LOC = 'Exif.Photo.PixelXDimension'
+HEIGHT_LOC = 'Exif.Photo.PixelYDimension'
+LAT_LOC = 'Exif.GPSInfo.GPSLatitude'
+LAT_REF_LOC = 'Exif.GPSInfo.GPSLatitudeRef'
+LON_LOC = 'Exif.GPSInfo.GPSLongitude'
+LON_REF_LOC = 'Exif.GPSInfo.GPSLongitudeRef'
+
+# capture details kept alongside titles/tags (date as 'YYYY-MM-DD HH:MM:SS', GPS in signed degrees)
+DETAIL_FIELDS = ('date', 'width', 'height', 'model', 'lat', 'lon')
 
 TAG_DELIM_CHAR = ';'
 TAG_DELIM_DEFAULT = '; '
@@ -70,29 +83,70 @@ def checkForKeyword(path, keyword):
     im.close()
     return keyword.lower() in title.lower() or keyword.lower() in tags.lower()
 
+# check already-read title/tags for a keyword, case-insensitively (matches `checkForKeyword`)
+def matchesKeyword(title, tags, keyword):
+    return keyword.lower() in title.lower() or keyword.lower() in TAG_DELIM_DEFAULT.join(tags).lower()
+
 # clean a tag (removing null bytes)
 def tagClean(s):
     return ''.join(filter(lambda c: ord(c) != 0, s))
 
-# get title/tags from a file
-def getTitleAndTags(path):
+# convert an EXIF date ('YYYY:MM:DD HH:MM:SS') to a sortable 'YYYY-MM-DD HH:MM:SS' ('' if invalid)
+def parseExifDate(s):
+    match = re.match(r'\s*(\d{4}):(\d{2}):(\d{2})(?:\s+(\d{2}):(\d{2}):(\d{2}))?', tagClean(s))
+    if not match or match.group(1) == '0000':
+        return ''
+    return '{}-{}-{} {}:{}:{}'.format(*[g or '00' for g in match.groups()])
+
+# convert an EXIF GPS coordinate ('d/1 m/1 s/100') and its reference to signed degrees (None if invalid)
+def parseExifCoordinate(s, ref):
+    try:
+        parts = [float(n) / float(d) for n, d in (r.split('/') for r in s.split())]
+    except (ValueError, ZeroDivisionError):
+        return None
+    if not parts:
+        return None
+    degrees = sum(p / 60**i for i, p in enumerate(parts[:3]))
+    return -degrees if ref.strip().upper() in ('S', 'W') else degrees
+
+# get title/tags and capture details (see DETAIL_FIELDS) from a file
+def getTitleTagsAndDetails(path):
+    details = dict.fromkeys(DETAIL_FIELDS)
     try:
         im = pyexiv2.Image(path)
     except: # failed to open
-        return '', []
+        return '', [], details
     exifData = im.read_exif()
     title = tagClean(exifData.get(TITLE_LOC, ''))
     tags = re.split(TAG_DELIM_RE, tagClean(exifData.get(TAG_LOC, '')))
     if '' in tags:
         tags.remove('')
+        
+    details['date'] = parseExifDate(exifData.get(DATE_LOC, ''))
+    details['model'] = tagClean(exifData.get(MODEL_LOC, '')).strip()
+    try:
+        details['width'] = im.get_pixel_width()
+        details['height'] = im.get_pixel_height()
+    except: # fall back to the EXIF copy of the dimensions
+        try:
+            details['width'] = int(exifData[WIDTH_LOC])
+            details['height'] = int(exifData[HEIGHT_LOC])
+        except (KeyError, ValueError):
+            pass
+    details['lat'] = parseExifCoordinate(exifData.get(LAT_LOC, ''), exifData.get(LAT_REF_LOC, ''))
+    details['lon'] = parseExifCoordinate(exifData.get(LON_LOC, ''), exifData.get(LON_REF_LOC, ''))
     im.close()
-    return title, tags
+    return title, tags, details
+
+# get title/tags from a file
+def getTitleAndTags(path):
+    return getTitleTagsAndDetails(path)[:2]
 
 # handle the title/tag editing and displaying of a file
 class FileHandler:
     
-    # read the image, initialize title/tags, and prompt the viewer
-    def __init__(self, path):
+    # read the image, initialize title/tags, and prompt the viewer (unless `show` is False)
+    def __init__(self, path, show=True):
         # read the image
         self.path = path
         self.image = pyexiv2.Image(path)
@@ -106,7 +160,8 @@ class FileHandler:
         self.tags.sort()
         
         # display the file
-        showFile(path)
+        if show:
+            showFile(path)
     
     # title getter
     def getTitle(self):
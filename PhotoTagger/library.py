@@ -0,0 +1,328 @@
+"""
+TITLE:          Photo Library
+
+DESCRIPTION:    Manages a saved library of several root directories (possibly
+                    on different disks or network mounts). Roots are listed
+                    one per line in Library.txt in the installation directory.
+                    Roots on the same device are handled by a single worker,
+                    while separate devices are scanned in parallel. Each root
+                    keeps its own index shard (file size, modification time,
+                    title, tags, and capture details) so that only changed
+                    files are re-read. Shards hold one line per file, kept
+                    as JSON text until the file is visited, and each pass
+                    writes the next shard as it goes, so the entries of a
+                    large library are not all held as Python objects.
+                    Capture detail filters are checked against the stored
+                    details, without reading EXIF again.
+                    During long reads, new and changed entries are appended
+                    to a journal next to the shard, which is merged back in
+                    when the shard is loaded and folded into it by the next
+                    complete save, so an interrupted scan resumes where it
+                    stopped without rewriting the whole shard; files changed
+                    in the meantime are detected by their size and time.
+
+AUTHOR:         Benjamin Whitsett
+MODIFIED:       Oct. 19, 2026
+"""
+
+import os
+import json
+import hashlib
+import threading
+import time
+from concurrent.futures import wait
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+import fileHandler
+import duplicates
+
+COMMENT_CHAR = '#'
+DEFAULT_LIBRARY_FILE = os.path.join(os.path.split(__file__)[0], 'TemplateLibrary.txt')
+LIBRARY_FILE = os.path.join(os.path.split(__file__)[0], 'Library.txt')
+SHARD_DIR_LOC = os.path.join(os.path.split(__file__)[0], 'index')
+SHARD_VERSION = 3
+CHECKPOINT_INTERVAL = 30    # seconds between partial shard saves during long reads
+POLL_INTERVAL = 0.1         # seconds between checks for Ctrl+C while waiting on workers
+
+# try loading library roots from the library file (missing or invalid roots are skipped,
+#  as are repeated roots and roots inside another root, whose files would be listed twice)
+def loadRoots():
+    if not os.path.exists(LIBRARY_FILE):
+        with open(DEFAULT_LIBRARY_FILE, 'r') as fin, open(LIBRARY_FILE, 'w') as fout:
+            fout.write(fin.read())
+    roots = []
+    with open(LIBRARY_FILE, 'r') as fin:
+        for line in fin:
+            line = line.strip().strip('"\'')
+            if not line or line[0] == COMMENT_CHAR:
+                continue
+            root = os.path.abspath(line)
+            if os.path.isdir(root):
+                roots.append(root)
+    kept = []
+    for i, root in enumerate(roots):
+        repeated = any(isWithin(root, other) and isWithin(other, root) for other in roots[:i])
+        nested = any(isWithin(root, other) and not isWithin(other, root) for other in roots)
+        if not repeated and not nested:
+            kept.append(root)
+    return kept
+
+# is a path the same as or inside another directory? (case-insensitive where the filesystem is)
+def isWithin(path, directory):
+    path, directory = os.path.normcase(path), os.path.normcase(directory)
+    return path == directory or path.startswith(os.path.join(directory, ''))
+
+# identify the device holding a root (network shares are told apart by their share name)
+def deviceKey(root):
+    drive = os.path.splitdrive(root)[0]
+    if drive.startswith('\\\\') or drive.startswith('//'): # UNC share
+        return drive.lower()
+    try:
+        return os.stat(root).st_dev
+    except OSError:
+        return drive.lower()
+
+# group roots by device, keeping the original root order within each group
+def groupByDevice(roots):
+    groups = {}
+    for root in roots:
+        groups.setdefault(deviceKey(root), []).append(root)
+    return list(groups.values())
+
+# call func(root, cancel) for every root, with one worker thread per device;
+#  returns the results in the same order as the roots
+#  (on Ctrl+C, the `cancel` event of this call is set so workers stop early, and the interrupt is re-raised)
+def perDevice(roots, func):
+    cancel = threading.Event()
+    def work(group):
+        return [func(root, cancel) for root in group]
+    groups = groupByDevice(roots)
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, len(groups))) as pool:
+        futures = [pool.submit(work, group) for group in groups]
+        try:
+            while wait(futures, timeout=POLL_INTERVAL).not_done: # stay responsive to Ctrl+C
+                pass
+        except KeyboardInterrupt:
+            cancel.set()
+            wait(futures)
+            raise
+        for group, future in zip(groups, futures):
+            results.update(zip(group, future.result()))
+    return [results[root] for root in roots]
+
+"""
+Index shards
+|
+V
+"""
+
+# location of the index shard for a root
+def shardPath(root):
+    digest = hashlib.sha1(os.path.normcase(root).encode('utf-8')).hexdigest()
+    return os.path.join(SHARD_DIR_LOC, digest + '.json')
+
+# location of the journal of entries read since a root's shard was last saved in full
+def journalPath(root):
+    return os.path.splitext(shardPath(root))[0] + '.journal'
+
+# first line of a shard or journal file, identifying its format and root
+def shardHeader(root):
+    return json.dumps({'version': SHARD_VERSION, 'root': root}) + '\n'
+
+# line of a shard or journal file for one entry: its relative path and its entry JSON, separated by a tab
+#  (JSON escapes tabs inside strings, so the first tab always ends the path)
+def shardLine(rel, text):
+    return json.dumps(rel) + '\t' + text + '\n'
+
+# add the entries of a shard or journal file to {relative path: entry JSON} (later lines win);
+#  a file of another version or root is ignored
+def readShardFile(path, root, entries):
+    try:
+        with open(path, 'r', encoding='utf-8') as fin:
+            try:
+                header = json.loads(fin.readline())
+            except ValueError:
+                return
+            if not isinstance(header, dict) or header.get('version') != SHARD_VERSION or header.get('root') != root:
+                return
+            for line in fin:
+                rel, tab, text = line.rstrip('\n').partition('\t')
+                try:
+                    entries[json.loads(rel)] = text
+                except ValueError: # a line cut short by a crash
+                    continue
+    except OSError:
+        pass
+
+# load the stored entries for a root, journal included, as {relative path: entry JSON};
+#  entries ([size, mtime, title, tags, [details in DETAIL_FIELDS order](, hash)]) are only parsed once used,
+#  and the perceptual hash is only present once a duplicate scan has computed it
+def loadShard(root):
+    entries = {}
+    readShardFile(shardPath(root), root, entries)
+    readShardFile(journalPath(root), root, entries)
+    return entries
+
+# create the shard folder if needed
+def makeShardDir():
+    try:
+        os.mkdir(SHARD_DIR_LOC)
+    except FileExistsError:
+        pass
+
+# append new or changed entries ({relative path: entry JSON}) to a root's journal
+def appendJournal(root, entries):
+    if not entries:
+        return
+    makeShardDir()
+    with open(journalPath(root), 'a+b') as fout:
+        if fout.tell() == 0:
+            fout.write(shardHeader(root).encode('utf-8'))
+        else:
+            fout.seek(-1, os.SEEK_END)
+            if fout.read(1) != b'\n': # end a line cut short by a crash, so it cannot swallow the next one
+                fout.write(b'\n')
+        fout.write(''.join(shardLine(rel, text) for rel, text in entries.items()).encode('utf-8'))
+
+# read titles/tags for files under one root, reusing shard entries for unchanged files;
+#  each entry is written to the root's next shard as soon as it is read, so entries are not kept in memory
+class ShardReader:
+    
+    # load the root's existing shard and start its replacement (with `filters`, files failing the detail filters
+    #  are skipped when read; with `hashes`, perceptual hashes are computed where missing)
+    def __init__(self, root, filters=(), hashes=False):
+        self.root = root
+        self.old = loadShard(root) # entries not visited yet in this pass
+        self.changed = {} # entries read or hashed since the last checkpoint
+        self.lastSave = time.monotonic()
+        self.filters = filters
+        self.hashes = hashes
+        makeShardDir()
+        self.out = open(shardPath(root) + '.tmp', 'w', encoding='utf-8')
+        self.out.write(shardHeader(root))
+        
+    # get (path, title, tags, details) for a file (plus its perceptual hash with `hashes`), or None if it has
+    #  vanished (or fails the detail filters); size and mtime may come from enumeration
+    def read(self, path, size=None, mtime=None):
+        rel = os.path.relpath(path, self.root)
+        if size is None or mtime is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                return None
+            size, mtime = stat.st_size, stat.st_mtime_ns
+        text = self.old.pop(rel, None)
+        try:
+            entry = None if text is None else json.loads(text)
+        except ValueError: # damaged line, read the file again
+            entry = None
+        if entry is None or entry[0] != size or entry[1] != mtime:
+            title, tags, details = fileHandler.getTitleTagsAndDetails(path)
+            entry = [size, mtime, title, tags, [details.get(field) for field in fileHandler.DETAIL_FIELDS]]
+            text = None
+        if self.hashes and len(entry) < 6:
+            entry.append(duplicates.perceptualHash(path))
+            text = None
+        if text is None: # new or changed
+            text = json.dumps(entry, separators=(',', ':'))
+            self.changed[rel] = text
+            self.maybeCheckpoint()
+        self.out.write(shardLine(rel, text))
+        
+        details = dict(zip(fileHandler.DETAIL_FIELDS, entry[4]))
+        if self.filters and not matchesFilters(details, self.filters):
+            return None
+        return (path, entry[2], entry[3], details) + ((entry[5],) if self.hashes else ())
+    
+    # checkpoint if enough time has passed since the last save
+    def maybeCheckpoint(self):
+        if time.monotonic() - self.lastSave > CHECKPOINT_INTERVAL:
+            self.checkpoint()
+        
+    # save progress without ending the pass, by journaling only the entries changed since the last checkpoint
+    def checkpoint(self):
+        appendJournal(self.root, self.changed)
+        self.changed = {}
+        self.lastSave = time.monotonic()
+        
+    # end the pass: a complete pass replaces the shard (and its journal) in one step, while a partial pass
+    #  only journals its changes, keeping the old entries of unvisited files
+    def save(self, complete=True):
+        self.out.close()
+        path = shardPath(self.root)
+        if complete:
+            os.replace(path + '.tmp', path)
+            try:
+                os.remove(journalPath(self.root))
+            except FileNotFoundError:
+                pass
+        else:
+            os.remove(path + '.tmp')
+            self.checkpoint()
+
+# bring a root's shard up to date for the files of a path store, re-reading only new or changed ones;
+#  yields (title, tags, details) for each file, in order (plus the perceptual hash if `hashes`);
+#  stops early (saving a partial shard) once the optional `cancel` event is set or the rows stop being taken
+progressLock = threading.Lock()
+progressPosition = 0
+def iterShard(root, store, hashes=False, cancel=None):
+    global progressPosition
+    with progressLock:
+        position = progressPosition
+        progressPosition += 1
+
+    reader = ShardReader(root, hashes=hashes)
+    vanished = ('', [], dict.fromkeys(fileHandler.DETAIL_FIELDS)) + ((None,) if hashes else ())
+    finished = False
+    try:
+        for i in tqdm(range(len(store)), desc=os.path.split(root)[1] or root, position=position, leave=True):
+            if cancel is not None and cancel.is_set():
+                break
+            row = reader.read(store[i], store.size(i), store.mtime(i))
+            yield vanished if row is None else row[1:]
+        finished = cancel is None or not cancel.is_set() # the store may be partial too
+    finally:
+        reader.save(complete=finished)
+
+# the rows of `iterShard` as a list
+def refreshShard(root, store, hashes=False, cancel=None):
+    return list(iterShard(root, store, hashes, cancel))
+
+# reset the progress bar positions before a new batch of refreshes
+def resetProgress():
+    global progressPosition
+    progressPosition = 0
+
+"""
+Capture detail filters
+|
+V
+"""
+
+# filters are (field, low, high) tuples with inclusive bounds (None if open);
+#  text fields (date, model) compare lowercase prefixes, so ('date', '2019-06', '2019-06') is all of June 2019
+TEXT_FIELDS = {'date', 'model'}
+
+# value of a filterable field ('megapixels' is derived from the dimensions)
+def detailValue(details, field):
+    if field == 'megapixels':
+        if details.get('width') and details.get('height'):
+            return details['width'] * details['height'] / 1e6
+        return None
+    value = details.get(field)
+    if field in TEXT_FIELDS:
+        return value.lower() if value else None
+    return value
+
+# does a value lie within the inclusive bounds? (text compared by prefix)
+def inRange(value, low, high):
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return (low is None or value[:len(low)] >= low) and (high is None or value[:len(high)] <= high)
+    return (low is None or value >= low) and (high is None or value <= high)
+
+# check capture details against every filter
+def matchesFilters(details, filters):
+    return all(inRange(detailValue(details, field), low, high) for field, low, high in filters)
@@ -9,19 +9,28 @@ DESCRIPTION:    Provides a user interface for managing and searching titles and
                     in the README. Written for Windows 11.
 
 AUTHOR:         Benjamin Whitsett
-MODIFIED:       Mar. 26, 2026
+MODIFIED:       Oct. 19, 2026
 """
 
 import os
 import inquirer # [sigh] documentation isn't great
 import fileHandler
+import library
+import pipeline
+import pathStore
+import checkpoint
+import duplicates
 import subprocess
 import time
 from PIL import Image
-from tqdm import tqdm
 import winshell
 import shutil
+import zipfile
+import tempfile
+import threading
+import signal
 from pathlib import Path
+import re
 
 COMMENT_CHAR = '#'
 DEFAULT_SUGGESTION_FILE = os.path.join(os.path.split(__file__)[0], 'TemplateSuggestions.txt')
@@ -40,6 +49,24 @@ COPIED_VIEWER_NAME = 'PHOTO_VIEWER.html'
 VIEWER_TAG_DELIM = '; '
 VIEWER_PATH_SPACER = '\t'
 
+DETAIL_FILTER_NAMES = {'date': 'Capture date',
+                       'megapixels': 'Megapixels',
+                       'width': 'Width (pixels)',
+                       'height': 'Height (pixels)',
+                       'model': 'Camera model',
+                       'lat': 'Latitude (degrees, negative for south)',
+                       'lon': 'Longitude (degrees, negative for west)'}
+DATE_FILTER_RE = r'^\d{4}(-\d{2}(-\d{2})?)?$'
+
+ARCHIVE_NAME = 'SearchResults.zip'
+ARCHIVE_STORED_TYPES = {'.jp2', '.j2k', '.jpf', '.jpm', '.jpg2', '.j2c', '.jpc', '.jpx', '.mj2',
+                        '.jpg', '.jpeg', '.jpe', '.jif', '.jfif', '.jfi',
+                        '.webp'} # already compressed, so stored without recompression
+ARCHIVE_BUFFER_SIZE = 8 * 2**20
+
+SEARCH_CHECKPOINT = 'search'
+OUTPUT_SHORTCUTS, OUTPUT_COPIES, OUTPUT_ARCHIVE = range(3)
+
 """
 Utility functions
 |
@@ -63,6 +90,29 @@ def customDirValidate(_, path):
         raise inquirer.errors.ValidationError('', reason=f'"{path}" is not a valid directory path.')
     return True
 
+# stream a file into an open ZIP archive under the given alias (ZIP64 for large files)
+def addToArchive(zf, source, alias):
+    info = zipfile.ZipInfo.from_file(source, alias)
+    if os.path.splitext(source)[1].lower() in ARCHIVE_STORED_TYPES:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    with open(source, 'rb', buffering=ARCHIVE_BUFFER_SIZE) as fin, \
+            zf.open(info, 'w', force_zip64=info.file_size >= zipfile.ZIP64_LIMIT) as dest:
+        shutil.copyfileobj(fin, dest, ARCHIVE_BUFFER_SIZE)
+
+# call func(*args) with Ctrl+C held back until it returns, then raise the interrupt if one came
+#  (an archive entry left early would still be finished by zipfile, as a truncated file with a valid CRC)
+def holdInterrupts(func, *args):
+    interrupted = []
+    previous = signal.signal(signal.SIGINT, lambda *_: interrupted.append(True))
+    try:
+        return func(*args)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+        if interrupted:
+            raise KeyboardInterrupt()
+
 """
 Interface functions
 |
@@ -109,60 +159,141 @@ def editSuggestionFile():
     input('\nPress Enter to return to the main menu.')
     return
 
-# recursively get paths to all subfiles, checking the integrity of images with bad extensions
+# open notepad to edit the library file (one root directory per line)
+def editLibraryFile():
+    clearTerminal()
+    print('Edit Library\n')
+    print('The library file will open in a new window.')
+    print('Save and close the file once you are done editing it.')
+    print('List one directory per line; folders on different disks are scanned in parallel.')
+    print(f'Note that any line which is blank or starts with "{library.COMMENT_CHAR}" will be ignored.')
+    
+    library.loadRoots() # create the file if needed
+    proc = subprocess.Popen(['notepad', library.LIBRARY_FILE], shell=True)# WINDOWS
+    while proc.poll() is None:
+        time.sleep(0.1)
+    
+    print()
+    roots = library.loadRoots()
+    print(f'{len(roots)} library directories found:')
+    for root in roots:
+        print('    ' + root)
+    input('\nPress Enter to return to the main menu.')
+    return
+
+# ask for a single directory or the saved library, returning the list of root directories
+def chooseRoots(message):
+    roots = library.loadRoots()
+    if roots:
+        choices = ['A single directory', f'Saved library ({len(roots)} directories)']
+        selected = inquirer.list_input('Choose what to use',
+                    choices = choices, default = choices[0], carousel=True)
+        if selected == choices[1]:
+            return roots
+    return [cleanPath(inquirer.text(message, validate=customDirValidate))]
+
+# get all subimages of several roots (one worker per device), merged in root order into one path store
+def getLibrarySubimages(roots, strict=False):
+    global runningSize
+    runningSize = 0
+    store = pathStore.PathStore()
+    for rootStore in library.perDevice(roots, lambda root, cancel: getSubimages(root, strict, False, cancel)):
+        store.extend(rootStore)
+    return store
+
+# enumerate compatible images and refresh each root's index shard (one worker per device);
+#  returns a merged path store (in root order) and the matching (title, tags, details) for each file
+#  (plus each file's perceptual hash if `hashes`)
+def scanLibrary(roots, hashes=False):
+    global runningSize
+    runningSize = 0
+    library.resetProgress()
+    def scanRoot(root, cancel):
+        store = getSubimages(root, strict=True, resetCounter=False, cancel=cancel)
+        return store, library.refreshShard(root, store, hashes, cancel)
+    store = pathStore.PathStore()
+    infos = []
+    for rootStore, rootInfos in library.perDevice(roots, scanRoot):
+        store.extend(rootStore)
+        infos += rootInfos
+    return store, infos
+
+# recursively get all subfiles as a path store, checking the integrity of images with bad extensions
+#  (the walk stops early once the optional `cancel` event is set)
 runningSize = 0
-def getSubimages(path, strict=False, resetCounter=True):
+runningSizeLock = threading.Lock() # shared by parallel scans
+def getSubimages(path, strict=False, resetCounter=True, cancel=None):
     global runningSize
     if resetCounter:
         runningSize = 0
-    
+    store = pathStore.PathStore()
+    store.addRoot(path)
+    for directory, name, size, mtime in walkSubimages(path, strict, cancel=cancel):
+        store.addFile(directory, name, size, mtime)
+    return store
+
+# lazily yield (path, size, mtime) for the same files as `getSubimages`, in the same order
+def iterSubimages(path, strict=False, report=True):
+    for directory, name, size, mtime in walkSubimages(path, strict, report):
+        yield os.path.join(directory, name), size, mtime
+
+# walk the subfiles one folder at a time, yielding (directory, name, size, mtime) (sorted case-insensitively)
+def walkSubimages(path, strict=False, report=True, cancel=None):
+    global runningSize
+    if cancel is not None and cancel.is_set(): # a parallel scan was interrupted
+        return
     files = []
     folders = []
     try:
-        for item in os.listdir(path):
-            subpath = os.path.join(path, item)
-            if os.path.isfile(subpath):
-                
-                # if not a compatible type, must do extra checks
-                if not os.path.splitext(subpath)[1].lower() in COMPATIBLE_IMAGE_TYPES:
-                    if strict:
-                        continue
+        with os.scandir(path) as entries:
+            for entry in entries:
+                subpath = entry.path
+                if entry.is_file():
                     
-                    # check if this file has already been converted
-                    if os.path.isfile(os.path.splitext(subpath)[0] + CONVERSION_DEFAULT):
-                        continue
+                    # if not a compatible type, must do extra checks
+                    if not os.path.splitext(subpath)[1].lower() in COMPATIBLE_IMAGE_TYPES:
+                        if strict:
+                            continue
+                        
+                        # check if this file has already been converted
+                        if os.path.isfile(os.path.splitext(subpath)[0] + CONVERSION_DEFAULT):
+                            continue
+                        
+                        # check if this file is not an image
+                        try:
+                            with Image.open(subpath) as img:
+                                img.verify()
+                        except:
+                            continue
                     
-                    # check if this file is not an image
-                    try:
-                        with Image.open(subpath) as img:
-                            img.verify()
-                    except:
-                        continue
-                
-                files.append(subpath)
-                runningSize += os.path.getsize(subpath)
-            else:
-                folders.append(subpath)
+                    stat = entry.stat() # cached by the directory listing on Windows
+                    files.append((entry.name, stat.st_size, stat.st_mtime_ns))
+                    with runningSizeLock:
+                        runningSize += stat.st_size
+                else:
+                    folders.append(subpath)
     except PermissionError:
         pass
     
-    files.sort(key = lambda x: x.lower())
+    files.sort(key = lambda x: x[0].lower())
     folders.sort(key = lambda x: x.lower())
-    print('{:,} B'.format(runningSize), end='\r')
+    if report:
+        print('{:,} B'.format(runningSize), end='\r')
+    for name, size, mtime in files:
+        yield path, name, size, mtime
     for folder in folders:
-        files += getSubimages(folder, strict, False)
-    return files
+        yield from walkSubimages(folder, strict, report, cancel)
 
 # edit the titles and subjects on images in an indicated directory
 def editTitlesAndTags():
     # get the source directory
     clearTerminal()
     print('Edit Titles And Subjects\n')
-    path = cleanPath(inquirer.text('Directory containing images (may drag/drop)', validate=customDirValidate))
+    roots = chooseRoots('Directory containing images (may drag/drop)')
     
-    # handle all files in the directory
+    # handle all files in the directories
     print('Enumerating...')
-    filePaths = getSubimages(path)
+    filePaths = getLibrarySubimages(roots)
     if not filePaths:
         input('\nNo images found. Press Enter for Main Menu.')
         return
@@ -328,26 +459,84 @@ def editTitlesAndTags():
                 fileHandler.closePreview()
                 raise KeyboardInterrupt()
             
+# ask the user for a capture detail filter (field, low, high), or None if no bounds were given
+def promptDetailFilter():
+    names = list(DETAIL_FILTER_NAMES.values())
+    field = list(DETAIL_FILTER_NAMES)[names.index(inquirer.list_input('Detail to filter by',
+                choices = names, default = names[0], carousel=True))]
+    
+    if field == 'model': # equality only
+        model = inquirer.text('Camera model (case-insensitive, may be the start of the name)').strip().lower()
+        return (field, model, model) if model else None
+    
+    if field == 'date':
+        def validate(answers, current):
+            if current.strip() and not re.match(DATE_FILTER_RE, current.strip()):
+                raise inquirer.errors.ValidationError('', reason='Use YYYY, YYYY-MM, or YYYY-MM-DD.')
+            return True
+        low = inquirer.text('Earliest date (YYYY, YYYY-MM, or YYYY-MM-DD; blank for none)', validate=validate).strip()
+        high = inquirer.text('Latest date (same format, may equal the earliest; blank for none)', validate=validate).strip()
+    else:
+        def validate(answers, current):
+            try:
+                if current.strip():
+                    float(current)
+            except ValueError:
+                raise inquirer.errors.ValidationError('', reason='Enter a number, or leave blank for none.')
+            return True
+        low = inquirer.text('Minimum (blank for none)', validate=validate).strip()
+        high = inquirer.text('Maximum (blank for none)', validate=validate).strip()
+        low = float(low) if low else ''
+        high = float(high) if high else ''
+        
+    if low == '' and high == '':
+        return None
+    return (field, None if low == '' else low, None if high == '' else high)
+
+# describe a capture detail filter for display
+def describeFilter(filt):
+    field, low, high = filt
+    name = DETAIL_FILTER_NAMES[field].split(' (')[0]
+    if low == high:
+        return f'{name} = {low}'
+    if low is None:
+        return f'{name} <= {high}'
+    if high is None:
+        return f'{name} >= {low}'
+    return f'{name} {low} to {high}'
+
 # search for keywords in the titles and subjects of images in the indicated directory
 def searchTitlesAndTags():
-    # get the source directory
     clearTerminal()
     print('Search Titles And Subjects\n')
-    path = cleanPath(inquirer.text('Directory to search (may drag/drop)', validate=customDirValidate))
     
-    # get the keywords
+    # offer to resume an interrupted search
+    state = checkpoint.load(SEARCH_CHECKPOINT)
+    if state is not None:
+        if os.path.isdir(state['targDir']) and inquirer.confirm(
+                f'Resume the interrupted search into "{state["targDir"]}" ({len(state["placed"])} results placed so far)?',
+                default=True):
+            return runSearch(state)
+        checkpoint.clear(SEARCH_CHECKPOINT)
+    
+    # get the source directory
+    roots = chooseRoots('Directory to search (may drag/drop)')
+    
+    # get the keywords and capture detail filters
     keywords = [] #stored in lowercase
+    filters = []
     lastChoice = None
     while True:
         clearTerminal()
         print('Search Titles And Subjects\n')
         print('Keywords required:', ('\n' + ' '*19).join(keywords))
+        print('Details required: ', ('\n' + ' '*19).join([describeFilter(f) for f in filters]))
         print()
-        choices = ['Add Keyword', 'Remove Keyword', 'Search', 'Main Menu']
+        choices = ['Add Keyword', 'Remove Keyword', 'Add Detail Filter', 'Remove Detail Filter', 'Search', 'Main Menu']
         
         def validate(answers, current):
-            if current == choices[2] and not keywords:
-                raise inquirer.errors.ValidationError("", reason=f'You must provide at least one keyword.')
+            if current == choices[4] and not keywords and not filters:
+                raise inquirer.errors.ValidationError("", reason=f'You must provide at least one keyword or detail filter.')
             return True
         
         selected = inquirer.list_input('Make a selection',
@@ -398,82 +587,261 @@ def searchTitlesAndTags():
             if toRemove:
                 keywords.remove(toRemove.lower())
                 
-        elif selected == choices[2]: # search
+        elif selected == choices[2]: # add capture detail filter
+            try:
+                filt = promptDetailFilter()
+            except KeyboardInterrupt:
+                continue
+            if filt is not None and filt not in filters:
+                filters.append(filt)
+                
+        elif selected == choices[3]: # remove capture detail filter
+            if not filters:
+                continue
+            descriptions = [describeFilter(f) for f in filters]
+            try:
+                toRemove = inquirer.list_input('Filter to remove', choices = descriptions, carousel=True)
+            except KeyboardInterrupt:
+                continue
+            filters.pop(descriptions.index(toRemove))
+                
+        elif selected == choices[4]: # search
             break
             
-        elif selected == choices[3]: # main menu
+        elif selected == choices[5]: # main menu
             raise KeyboardInterrupt()
-        
-    # start the search
-    clearTerminal()
-    print('Search Titles And Subjects\n')
-    print('Enumerating...')
-    filePaths = getSubimages(path, strict=True)
-    filePaths = [f for f in filePaths if os.path.splitext(f)[1].lower() in COMPATIBLE_IMAGE_TYPES]
-    print('\nSearching...')
-    keepers = []
-    totSize = 0
-    aliases = []
-    aliasSet = set()
-    for f in tqdm(filePaths):
-        if all([fileHandler.checkForKeyword(f, k) for k in keywords]):
-            keepers.append(f)
-            totSize += os.path.getsize(f)
-            
-            # generate a unique alias for the file
-            alias = lambda s: os.path.splitext(os.path.split(f)[1])[0] + s + os.path.splitext(f)[1]
-            suffix = ''
-            while alias(suffix) in aliasSet:
-                if suffix:
-                    suffix = '_' + str(1+int(suffix[1:]))
-                else:
-                    suffix = '_2'
-            aliases.append(alias(suffix))
-            aliasSet.add(aliases[-1])
             
-    # report results to user
+    # choose where and how results should be placed (results stream there as they are found)
     clearTerminal()
     print('Search Titles and Subjects\n')
-    print(f'{len(keepers)} files found.\n')
     def validate(answers, current):
         customDirValidate(answers, current) # ensure existent dir
         current = cleanPath(current)
         if os.listdir(current): # ensure empty
             raise inquirer.errors.ValidationError('', reason=f'Directory "{current}" must be empty.')
+        if any(library.isWithin(current, root) for root in roots): # results would be found again while searching
+            raise inquirer.errors.ValidationError('', reason=f'Directory "{current}" must not be inside a searched directory.')
         return True
     targDir = cleanPath(inquirer.text('Empty folder where results should be placed (may drag/drop)', validate=validate))
     print()
     
-    # choose result mode
-    choices = [f'Shortcuts (<{round(3*len(keepers)/1024., 3)} MB, more cumbersome to access)', f'Copies ({round(totSize/2**20., 3)} MB, easier to access)']
+    choices = ['Shortcuts (very small, more cumbersome to access)',
+               'Copies (easier to access)',
+               f'Archive (single {ARCHIVE_NAME} for sharing)']
     selected = inquirer.list_input('Choose output mode',
                 choices = choices, default = choices[0], carousel=True)
     
-    # make shortcuts or copies
-    if selected == choices[0]: # shortcuts
-        for source, alias in tqdm(list(zip(keepers, aliases))):
-            shortcut = winshell.shortcut(os.path.join(targDir, alias + '.lnk'))
-            shortcut.path = source
-            shortcut.description = alias
-            shortcut.write()
+    def validate(answers, current):
+        if current.strip() and not (current.strip().isdigit() and int(current) > 0):
+            raise inquirer.errors.ValidationError('', reason='Enter a positive whole number, or leave blank for no limit.')
+        return True
+    limit = inquirer.text('Stop after how many matches? (leave blank for no limit)', validate=validate).strip()
+    limit = int(limit) if limit else None
+    
+    state = {'roots': roots, 'keywords': keywords, 'filters': filters, 'targDir': targDir,
+             'mode': choices.index(selected), 'limit': limit,
+             'placed': {}, # source path -> [alias, size, mtime] of each placed result
+             'damaged': None} # alias of the first archive entry that was started but not finished
+    return runSearch(state)
+
+# does a result placed by an earlier run of a search still match it? (unchanged files still do)
+def stillMatches(path, size, mtime, matches, filters):
+    try:
+        stat = os.stat(path)
+        if [stat.st_size, stat.st_mtime_ns] == [size, mtime]:
+            return True
+        row = (None, path) + fileHandler.getTitleTagsAndDetails(path)
+        return matches(row) and library.matchesFilters(row[4], filters)
+    except Exception: # vanished or unreadable
+        return False
+
+# run a search described by `state`, placing each result as soon as it is found;
+#  progress is checkpointed so an interrupted search can be resumed
+def runSearch(state):
+    roots = [root for root in state['roots'] if os.path.isdir(root)]
+    keywords = state['keywords']
+    filters = [tuple(f) for f in state['filters']]
+    targDir = state['targDir']
+    mode = state['mode']
+    limit = state['limit']
+    placed = state['placed']
     
-    else: # copies
-        for source, alias in tqdm(list(zip(keepers, aliases))):
-            shutil.copyfile(source, os.path.join(targDir, alias))
+    clearTerminal()
+    print('Search Titles And Subjects\n')
+    matches = lambda row: all([fileHandler.matchesKeyword(row[2], row[3], k) for k in keywords]) # filters are checked while reading
+    
+    # withdraw results placed before an interruption that were deleted or no longer match since
+    stale = [f for f, (_, size, mtime) in placed.items() if not stillMatches(f, size, mtime, matches, filters)]
+    if stale:
+        print(f'{len(stale)} results placed before no longer match and are withdrawn:')
+        for f in stale:
+            print(f'    {f}')
+        print()
+    if mode != OUTPUT_ARCHIVE:
+        for f in stale:
+            alias = placed.pop(f)[0]
+            try:
+                os.remove(os.path.join(targDir, alias + '.lnk' if mode == OUTPUT_SHORTCUTS else alias))
+            except FileNotFoundError:
+                pass
+    
+    # an archive can only be continued if it is intact and all of its files are unchanged and still match
+    archive = None
+    if mode == OUTPUT_ARCHIVE:
+        archivePath = os.path.join(targDir, ARCHIVE_NAME)
+        append = bool(placed) and not stale and not state.get('damaged')
+        try:
+            if append:
+                with zipfile.ZipFile(archivePath) as zf:
+                    names = set(zf.namelist())
+                for f, (alias, size, mtime) in placed.items():
+                    stat = os.stat(f)
+                    if alias not in names or [stat.st_size, stat.st_mtime_ns] != [size, mtime]:
+                        append = False
+                        break
+        except (OSError, zipfile.BadZipFile):
+            append = False
+        if placed and not append:
+            print('The archive will be rebuilt, since it was incomplete or its files changed or no longer match.\n')
+            placed.clear()
+        state['damaged'] = None
+        archiveFile = open(archivePath, 'r+b' if append else 'wb', buffering=ARCHIVE_BUFFER_SIZE)
+        archive = zipfile.ZipFile(archiveFile, 'a' if append else 'w', allowZip64=True)
+    
+    print('Searching... (results are listed as they are found)\n')
+    count = 0
+    totSize = 0
+    aliasSet = {alias for alias, _, _ in placed.values()}
+    checkpoint.save(SEARCH_CHECKPOINT, state)
+    lastSave = time.monotonic()
+    stopped = False
+    failed = None
+    
+    iterFiles = lambda root: iterSubimages(root, strict=True, report=False) # strict: compatible types only
+    results = pipeline.search(roots, iterFiles, matches, filters)
+    try:
+        for _, f, _, _, _ in results:
+            try:
+                stat = os.stat(f)
+                done = placed.get(f)
+                
+                # skip results placed before an interruption (unless the file changed since)
+                if done is None or (mode != OUTPUT_ARCHIVE and done[1:] != [stat.st_size, stat.st_mtime_ns]):
+                    if done is not None: # keep the alias used before
+                        name = done[0]
+                    else: # generate a unique alias for the file
+                        alias = lambda s: os.path.splitext(os.path.split(f)[1])[0] + s + os.path.splitext(f)[1]
+                        suffix = ''
+                        while alias(suffix) in aliasSet:
+                            if suffix:
+                                suffix = '_' + str(1+int(suffix[1:]))
+                            else:
+                                suffix = '_2'
+                        name = alias(suffix)
+                        aliasSet.add(name)
+                    
+                    # make a shortcut, copy, or archive entry
+                    if mode == OUTPUT_SHORTCUTS:
+                        shortcut = winshell.shortcut(os.path.join(targDir, name + '.lnk'))
+                        shortcut.path = f
+                        shortcut.description = name
+                        shortcut.write()
+                    elif mode == OUTPUT_COPIES:
+                        shutil.copyfile(f, os.path.join(targDir, name))
+                    else: # an unfinished entry (e.g. the source could not be read) damages the archive
+                        try:
+                            holdInterrupts(addToArchive, archive, f, name)
+                        except OSError:
+                            state['damaged'] = state.get('damaged') or name
+                            raise
+                    placed[f] = [name, stat.st_size, stat.st_mtime_ns]
+            except OSError as e: # moved or deleted since it was read, or could not be placed; skip just this one
+                print(f'Skipped {f} ({e})')
+                continue
+                
+            count += 1
+            totSize += stat.st_size
+            print(f'{count}: {f}')
+            if time.monotonic() - lastSave > library.CHECKPOINT_INTERVAL:
+                checkpoint.save(SEARCH_CHECKPOINT, state)
+                lastSave = time.monotonic()
+            if limit is not None and count >= limit:
+                break
+    except KeyboardInterrupt: # keep the results found so far
+        stopped = True
+    except Exception as e: # a file or folder could not be read; keep the results found so far
+        failed = e
+    finally:
+        results.close()
+        if archive is not None:
+            archive.close()
+            archiveFile.close()
             
+    if failed is not None:
+        checkpoint.save(SEARCH_CHECKPOINT, state)
+        print(f'\nSearch failed: {failed}\nChoose "Search Titles And Subjects" again to resume it once this is fixed.')
+    elif stopped:
+        checkpoint.save(SEARCH_CHECKPOINT, state)
+        print('\nSearch stopped. Choose "Search Titles And Subjects" again to resume it.')
+    elif state.get('damaged'):
+        checkpoint.save(SEARCH_CHECKPOINT, state)
+    else:
+        checkpoint.clear(SEARCH_CHECKPOINT)
+    if state.get('damaged'):
+        print(f'\nWarning: the archive entry "{state["damaged"]}" is incomplete. '
+              + 'Choose "Search Titles And Subjects" again to rebuild the archive.')
+    print(f'\n{count} files found ({round(totSize/2**20., 3)} MB).')
     os.startfile(targDir)
-    input('\nResults loaded!\nPress Enter to return to the main menu.')
+    input('\nResults loaded!\nPress Enter to return to the main menu.' if failed is None
+          else '\nPress Enter to return to the main menu.')
     return
 
+# write the viewer rows for the files of one root's path store, given their (title, tags, details) rows in order;
+#  the root's folder rows start with `rootParts` (its name in a library viewer)
+# -> rows like: '\t\tfolder1' and '\t\t\tfile.jpg\tTitle\tTag1; Tag2\tDate\tWidth\t...'
+def writeViewerRows(fout, store, rows, rootParts=()):
+    lastDir = None
+    lastParts = ()
+    for i, (title, tags, details) in enumerate(rows):
+        
+        # files are grouped by folder, so folder rows are only needed when the folder changes
+        d = store.parent(i)
+        if d != lastDir:
+            parts = rootParts + store.partsOf(d)
+            j = 0 # skip the head parts that agree with the previous folder
+            while j < len(parts) and j < len(lastParts) and parts[j] == lastParts[j]:
+                j += 1
+            for k in range(j, len(parts)):
+                fout.write(VIEWER_PATH_SPACER * k + parts[k] + '\n')
+            lastDir, lastParts = d, parts
+            
+        # add title, tag, and capture detail info to the file's row
+        row = [store.name(i), title, VIEWER_TAG_DELIM.join(tags)]
+        for field in fileHandler.DETAIL_FIELDS:
+            value = details.get(field)
+            if value is None:
+                value = ''
+            elif isinstance(value, float):
+                value = round(value, 6)
+            row.append(str(value))
+        fout.write(VIEWER_PATH_SPACER * len(lastParts) + VIEWER_PATH_SPACER.join(row) + '\n')
+
 # log the tag info from these files in a copied version of the viewer template
 def createHTMLViewer():
+    global runningSize
     # get the source directory
     clearTerminal()
     print('Create An HTML Viewer\n')
-    path = cleanPath(inquirer.text('Directory to catalog (may drag/drop)', validate=customDirValidate))
+    roots = chooseRoots('Directory to catalog (may drag/drop)')
+    
+    # a single directory holds its own viewer; a library viewer goes wherever the user chooses
+    if len(roots) == 1:
+        outputDir = roots[0]
+    else:
+        outputDir = cleanPath(inquirer.text('Folder where the viewer should be saved (may drag/drop)', validate=customDirValidate))
     
     # confirm with user if the output file already exists
-    outputPath = os.path.join(path, COPIED_VIEWER_NAME)
+    outputPath = os.path.join(outputDir, COPIED_VIEWER_NAME)
     if os.path.isfile(outputPath):
         try:
             confirm = inquirer.confirm(f'This will overwrite the file {COPIED_VIEWER_NAME} in the selected directory. Continue?',
@@ -483,58 +851,128 @@ def createHTMLViewer():
         if not confirm:
             return
         
-    # collect the list of files to catalog
+    # library roots become top-level folders, named by absolute URL
+    rootParts = {root: (() if len(roots) == 1 else (Path(root).as_uri(),)) for root in roots}
+    
+    # enumerate and read each root (one worker per device), writing its rows to a temporary part of the viewer
+    #  as they are read, so only the root's path store is held in memory, not every file's titles and details
     clearTerminal()
     print('Create An HTML Viewer\n')
-    print('Enumerating...')
-    filePaths = getSubimages(path, strict=True)
-    filePaths = [f for f in filePaths if os.path.splitext(f)[1].lower() in COMPATIBLE_IMAGE_TYPES]
+    print('Enumerating and reading titles and subjects...')
+    runningSize = 0
+    library.resetProgress()
+    def writeRoot(root, cancel):
+        store = getSubimages(root, strict=True, resetCounter=False, cancel=cancel)
+        part = tempfile.TemporaryFile('w+')
+        writeViewerRows(part, store, library.iterShard(root, store, cancel=cancel), rootParts[root])
+        return part
+    parts = library.perDevice(roots, writeRoot)
     
-    # start compiling the file tree
-    print('\nParsing file tree...')
-    pathParts = [list(Path(f).relative_to(path).parts) for f in tqdm(filePaths)]
-
-    # erase head parts that agree with the previous path
-    # -> left with rows like: ('', '', 'folder1', 'folder2', 'file.jpg')
-    print('Simplifying paths...')
-    for i in tqdm(list(range(len(pathParts) - 1, 0, -1))): # exclude 0, since comparing i and i-1
-        j = 0
-        while j < len(pathParts[i]) and j < len(pathParts[i-1]) and pathParts[i][j] == pathParts[i-1][j]:
-            pathParts[i][j] = ''
-            j += 1
-            
-    # add title and tag info to the last path part
-    # -> left with rows like: ('', '', 'folder1', 'folder2', 'file.jpg\tTitle\tTag1; Tag2')
-    print('Adding title and tag info...')
-    for fp, pp in tqdm(list(zip(filePaths, pathParts))):
-        title, tags = fileHandler.getTitleAndTags(fp)
-        pp[-1] += VIEWER_PATH_SPACER + title + VIEWER_PATH_SPACER + VIEWER_TAG_DELIM.join(tags)
-        
-    # split each nontrivial path part into its own row
-    # -> left with rows like: ('', '', 'folder1') and ('', '', '', '', 'file.jpg\tTitle\tTag1; Tag2')
-    print('Splitting hierarchy...')
-    splitParts = []
-    for pp in tqdm(pathParts):
-        for i in range(len(pp)):
-            if pp[i]: # if this part is not empty
-                splitParts.append(tuple([''] * i + [pp[i]]))
-                
-    # join the rows to a string
-    datastring = '\n'.join([VIEWER_PATH_SPACER.join(row) for row in splitParts])
-    
-    # write the file
-    print('Writing file...')
+    # join the parts in root order inside the template
+    print('\nWriting file...')
     with open(HTML_VIEWER_TEMPLATE, 'r') as fin:
-        template = fin.read()
-    template = template.replace(DATA_INDICATOR, datastring)
+        head, tail = fin.read().split(DATA_INDICATOR, 1)
     with open(outputPath, 'w') as fout:
-        fout.write(template)
+        fout.write(head)
+        for part in parts:
+            part.seek(0)
+            shutil.copyfileobj(part, fout)
+            part.close()
+        fout.write(tail)
         
     # open the viewer file and report success
     os.startfile(outputPath)
     input('\nViewer created!\nPress Enter to return to the main menu.')
     return
 
+# find groups of near-duplicate images and share titles/subjects within a group
+def findDuplicates():
+    # get the source directory
+    clearTerminal()
+    print('Find Near-Duplicates\n')
+    roots = chooseRoots('Directory to check for near-duplicates (may drag/drop)')
+    
+    # hash every compatible image (hashes are kept in the index, so later scans only hash new files)
+    clearTerminal()
+    print('Find Near-Duplicates\n')
+    print('Enumerating, reading titles and subjects, and hashing...')
+    store, infos = scanLibrary(roots, hashes=True)
+    print('\nGrouping...')
+    groups = duplicates.findGroups([info[3] for info in infos])
+    if not groups:
+        input('\nNo near-duplicates found. Press Enter for Main Menu.')
+        return
+    
+    idx = 0
+    lastChoice = None
+    while True:
+        idx = max(0, min(len(groups) - 1, idx))
+        group = groups[idx]
+        
+        # print the group's files with their titles and subjects (and distance from the group's first file)
+        clearTerminal()
+        print('Find Near-Duplicates\n')
+        print(f'Group {idx+1} / {len(groups)}\n')
+        for i in group:
+            print(store[i])
+            if i != group[0]:
+                print(f'    Differs from the first file by {duplicates.hashDistance(infos[i][3], infos[group[0]][3])} bits (of {duplicates.HASH_WIDTH**2})')
+            print(f'    Title: {infos[i][0]}')
+            print(f'    Subjects: {VIEWER_TAG_DELIM.join(infos[i][1])}')
+        print()
+        choices = ['Next Group', 'Previous Group', 'Preview A File', 'Share Titles And Subjects In Group', 'Main Menu']
+        try:
+            selected = inquirer.list_input('Make a selection',
+                        choices = choices, default = lastChoice, carousel=True)
+        except KeyboardInterrupt:
+            selected = choices[-1]
+        lastChoice = selected
+        
+        if selected == choices[0]: # next group
+            idx += 1
+            
+        elif selected == choices[1]: # previous group
+            idx -= 1
+            
+        elif selected == choices[2]: # preview one of the files
+            try:
+                toShow = inquirer.list_input('File to preview', choices = [store[i] for i in group], carousel=True)
+            except KeyboardInterrupt:
+                continue
+            fileHandler.showFile(toShow)
+            
+        elif selected == choices[3]: # give the chosen files the union of their subjects, and a title where missing
+            try:
+                paths = inquirer.checkbox('Files to share between (Space to toggle, Enter to confirm)',
+                                          choices = [store[i] for i in group], default = [store[i] for i in group])
+            except KeyboardInterrupt:
+                continue
+            chosen = [i for i in group if store[i] in paths]
+            if len(chosen) < 2:
+                continue
+            tags = sorted(set().union(*[infos[i][1] for i in chosen]))
+            title = next((infos[i][0] for i in chosen if infos[i][0]), '')
+            try:
+                confirm = inquirer.confirm(f'Give the {len(chosen)} chosen files the subjects "{VIEWER_TAG_DELIM.join(tags)}"'
+                                           + (f' and (where missing) the title "{title}"' if title else '') + '?', default=True)
+            except KeyboardInterrupt:
+                continue
+            if not confirm:
+                continue
+            for i in chosen:
+                fh = fileHandler.FileHandler(store[i], show=False)
+                if not fh.getTitle():
+                    fh.setTitle(title)
+                for tag in tags:
+                    if tag not in fh.getTags():
+                        fh.addTag(tag)
+                infos[i] = (fh.getTitle(), fh.getTags()) + tuple(infos[i][2:])
+                fh.close()
+            
+        else: # return to main menu
+            fileHandler.closePreview()
+            raise KeyboardInterrupt()
+
 # call git to update the software
 def update():
     clearTerminal()
@@ -560,9 +998,11 @@ if __name__ == '__main__':
             print()
             
             choices = [f'View/Edit Suggestions ({len(suggestions)} currently loaded)',
+                       f'View/Edit Library ({len(library.loadRoots())} directories)',
                        'Edit Titles And Subjects',
                        'Search Titles And Subjects',
                        'Create An HTML Viewer',
+                       'Find Near-Duplicates',
                        'Update',
                        'Exit']
             if lastChoice is None:
@@ -574,12 +1014,16 @@ if __name__ == '__main__':
             if selected == choices[0]:
                 editSuggestionFile()
             elif selected == choices[1]:
-                editTitlesAndTags()
+                editLibraryFile()
             elif selected == choices[2]:
-                searchTitlesAndTags()
+                editTitlesAndTags()
             elif selected == choices[3]:
-                createHTMLViewer()
+                searchTitlesAndTags()
             elif selected == choices[4]:
+                createHTMLViewer()
+            elif selected == choices[5]:
+                findDuplicates()
+            elif selected == choices[6]:
                 update()
             else:
                 break
@@ -0,0 +1,161 @@
+"""
+TITLE:          Path Store
+
+DESCRIPTION:    Provides a compact, list-like store of file paths for very large
+                    file lists. Each directory is stored once as a node (its
+                    interned name and the index of its parent), while files are
+                    kept in parallel arrays of parent directory index, name
+                    position, size, and modification time. File names are
+                    packed together as UTF-8 in a single byte buffer rather
+                    than kept as separate string objects. Full paths are only
+                    built when a file is looked up, and files of one directory
+                    stay grouped together in enumeration order.
+
+AUTHOR:         Benjamin Whitsett
+MODIFIED:       Oct. 19, 2026
+"""
+
+import os
+import sys
+from array import array
+
+NAME_ERRORS = 'surrogatepass' # keep undecodable names (lone surrogates) intact
+
+class PathStore:
+
+    # create an empty store
+    def __init__(self):
+        # directory nodes (roots have parent -1 and their full path as a name)
+        self.dirNames = []
+        self.dirParents = array('i')
+        self.dirPaths = [] # full path of each directory, for fast lookups
+        self.dirIndex = {} # full path -> directory index
+        self.dirParts = {} # directory index -> names below its root (cached on demand)
+
+        # file entries
+        self.fileParents = array('i')
+        self.nameBuffer = bytearray() # UTF-8 file names, back to back
+        self.nameStarts = array('q')  # position of each file's name in the buffer
+        self.nameLengths = array('i') # length of each file's encoded name
+        self.fileSizes = array('q')
+        self.fileMtimes = array('q') # nanoseconds
+
+    # add a root directory (stored under its full path) and return its index
+    def addRoot(self, path):
+        if path not in self.dirIndex:
+            self.addNode(path, -1)
+        return self.dirIndex[path]
+
+    # get the index of a directory, adding it (and any missing parents up to a known root) if needed
+    def addDir(self, path):
+        if path in self.dirIndex:
+            return self.dirIndex[path]
+        parentPath, name = os.path.split(path)
+        if not name or parentPath == path: # filesystem root, nothing above it
+            return self.addRoot(path)
+        return self.addNode(name, self.addDir(parentPath), path)
+
+    # append a directory node and return its index
+    def addNode(self, name, parent, path=None):
+        self.dirNames.append(sys.intern(name))
+        self.dirParents.append(parent)
+        self.dirPaths.append(name if path is None else path)
+        self.dirIndex[self.dirPaths[-1]] = len(self.dirPaths) - 1
+        return len(self.dirPaths) - 1
+
+    # add a file in a directory (directory given by path or index)
+    def addFile(self, directory, name, size=0, mtime=0):
+        if not isinstance(directory, int):
+            directory = self.addDir(directory)
+        start, length = self.packName(name)
+        self.fileParents.append(directory)
+        self.nameStarts.append(start)
+        self.nameLengths.append(length)
+        self.fileSizes.append(size)
+        self.fileMtimes.append(mtime)
+
+    # append every directory and file of another store
+    def extend(self, other):
+        offset = len(self.dirPaths)
+        for name, parent, path in zip(other.dirNames, other.dirParents, other.dirPaths):
+            self.dirNames.append(name)
+            self.dirParents.append(parent + offset if parent >= 0 else -1)
+            self.dirPaths.append(path)
+            self.dirIndex.setdefault(path, len(self.dirPaths) - 1)
+        self.fileParents.extend(p + offset for p in other.fileParents)
+        bufferOffset = len(self.nameBuffer)
+        self.nameBuffer += other.nameBuffer
+        self.nameStarts.extend(start + bufferOffset for start in other.nameStarts)
+        self.nameLengths.extend(other.nameLengths)
+        self.fileSizes.extend(other.fileSizes)
+        self.fileMtimes.extend(other.fileMtimes)
+
+    # pack a file name at the end of the name buffer, returning its position and length
+    def packName(self, name):
+        encoded = name.encode('utf-8', NAME_ERRORS)
+        self.nameBuffer += encoded
+        return len(self.nameBuffer) - len(encoded), len(encoded)
+
+    # number of files
+    def __len__(self):
+        return len(self.fileParents)
+
+    # name of a file (without its directory)
+    def name(self, i):
+        start = self.nameStarts[i]
+        return self.nameBuffer[start:start + self.nameLengths[i]].decode('utf-8', NAME_ERRORS)
+
+    # full path of a file
+    def __getitem__(self, i):
+        return os.path.join(self.dirPaths[self.fileParents[i]], self.name(i))
+
+    # iterate over full file paths
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    # replace a file by another path (e.g. a converted copy), refreshing its size and time
+    def __setitem__(self, i, path):
+        directory, name = os.path.split(path)
+        self.fileParents[i] = self.addDir(directory)
+        self.nameStarts[i], self.nameLengths[i] = self.packName(name) # the old name's bytes are left unused
+        try:
+            stat = os.stat(path)
+            self.fileSizes[i], self.fileMtimes[i] = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            self.fileSizes[i], self.fileMtimes[i] = 0, 0
+
+    # remove a file and return its path
+    def pop(self, i):
+        path = self[i]
+        del self.fileParents[i]
+        del self.nameStarts[i]
+        del self.nameLengths[i]
+        del self.fileSizes[i]
+        del self.fileMtimes[i]
+        return path
+
+    # directory index of a file
+    def parent(self, i):
+        return self.fileParents[i]
+
+    # size of a file in bytes
+    def size(self, i):
+        return self.fileSizes[i]
+
+    # modification time of a file in nanoseconds
+    def mtime(self, i):
+        return self.fileMtimes[i]
+
+    # root directory (full path) above a directory
+    def rootOf(self, d):
+        while self.dirParents[d] >= 0:
+            d = self.dirParents[d]
+        return self.dirPaths[d]
+
+    # names of a directory and its ancestors below their root, as a cached tuple
+    def partsOf(self, d):
+        if d not in self.dirParts:
+            parent = self.dirParents[d]
+            self.dirParts[d] = () if parent < 0 else self.partsOf(parent) + (self.dirNames[d],)
+        return self.dirParts[d]
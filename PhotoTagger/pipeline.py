@@ -0,0 +1,141 @@
+"""
+TITLE:          Search Pipeline
+
+DESCRIPTION:    Runs a search as a set of overlapping stages joined by bounded
+                    queues: enumeration and title/tag reading (one pair of
+                    threads per device), keyword matching, and finally the
+                    caller, which receives matches as soon as they are found.
+                    Closing the result generator early (e.g. after enough
+                    matches) stops every stage and saves the index shards
+                    read so far. An error in any stage is passed down the
+                    queues and re-raised to the caller, and the shards are
+                    then saved as partial, keeping their unvisited entries.
+
+AUTHOR:         Benjamin Whitsett
+MODIFIED:       Oct. 19, 2026
+"""
+
+import queue
+import threading
+import library
+
+QUEUE_SIZE = 256        # items held between two stages before the producer waits
+POLL_INTERVAL = 0.1     # seconds between checks for a stopped pipeline
+DONE = object()         # end-of-stream marker passed along each queue
+
+# end-of-stream marker for a stage that failed, carrying its error on to the caller
+class Failure:
+    
+    # remember the error
+    def __init__(self, error):
+        self.error = error
+
+# put an item on a bounded queue, returning False if the pipeline was stopped first
+def put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=POLL_INTERVAL)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+# take an item from a queue, returning DONE if the pipeline was stopped first
+def take(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            pass
+    return DONE
+
+# enumeration stage: list the files of each root (on one device) as (root, path, size, mtime)
+def enumerateStage(roots, iterFiles, out, stop):
+    end = DONE
+    try:
+        for root in roots:
+            for path, size, mtime in iterFiles(root):
+                if not put(out, (root, path, size, mtime), stop):
+                    return
+    except Exception as e:
+        end = Failure(e)
+    finally:
+        put(out, end, stop)
+
+# reading stage: look up titles/tags/details (through each root's shard) as (root, path, title, tags, details);
+#  files failing the detail filters are dropped here, using the details stored in the shard where possible
+#  (shards are only saved as complete if every file of the device was listed and read)
+def readStage(inq, out, filters, stop):
+    readers = {}
+    end = DONE
+    complete = False
+    try:
+        while (item := take(inq, stop)) is not DONE:
+            if isinstance(item, Failure): # the enumerator failed, pass its error on
+                end = item
+                return
+            root, path, size, mtime = item
+            if root not in readers:
+                readers[root] = library.ShardReader(root, filters)
+            row = readers[root].read(path, size, mtime)
+            if row is not None and not put(out, (root,) + row, stop):
+                return
+        complete = not stop.is_set()
+    except Exception as e:
+        end = Failure(e)
+    finally:
+        try:
+            for reader in readers.values():
+                reader.save(complete)
+        except Exception as e:
+            if end is DONE:
+                end = Failure(e)
+        put(out, end, stop)
+
+# matching stage: pass on the rows accepted by `matches`, once all producers are done
+def matchStage(inq, out, matches, producerCount, stop):
+    end = DONE
+    try:
+        while producerCount > 0:
+            item = take(inq, stop)
+            if item is DONE:
+                producerCount -= 1
+            elif isinstance(item, Failure): # a producer failed, pass its error on
+                end = item
+                return
+            elif matches(item) and not put(out, item, stop):
+                return
+    except Exception as e:
+        end = Failure(e)
+    finally:
+        put(out, end, stop)
+
+# search the roots, yielding (root, path, title, tags, details) for each match as it is found;
+#  `iterFiles(root)` lists a root's files as (path, size, mtime), `matches(row)` decides whether to keep a row,
+#  and optional detail `filters` (see `library`) are checked while reading, before `matches`;
+#  an error in any stage stops the search and is re-raised here
+def search(roots, iterFiles, matches, filters=()):
+    stop = threading.Event()
+    rowQueue = queue.Queue(QUEUE_SIZE)
+    matchQueue = queue.Queue(QUEUE_SIZE)
+
+    # one enumerator/reader pair per device, all feeding a single matcher
+    groups = library.groupByDevice(roots)
+    threads = []
+    for group in groups:
+        pathQueue = queue.Queue(QUEUE_SIZE)
+        threads.append(threading.Thread(target=enumerateStage, args=(group, iterFiles, pathQueue, stop), daemon=True))
+        threads.append(threading.Thread(target=readStage, args=(pathQueue, rowQueue, filters, stop), daemon=True))
+    threads.append(threading.Thread(target=matchStage, args=(rowQueue, matchQueue, matches, len(groups), stop), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    try:
+        while (item := take(matchQueue, stop)) is not DONE:
+            if isinstance(item, Failure):
+                raise item.error
+            yield item
+    finally: # finished, stopped early, or interrupted
+        stop.set()
+        for thread in threads:
+            thread.join()
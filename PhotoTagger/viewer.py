@@ -6,9 +6,12 @@ DESCRIPTION:    Manages popup image previewer for the user. Detects images
                     directory) and displays them in matplotlib. Images are
                     deleted from the preview folder after they are loaded.
                     Closing the preview window terminates the program.
+                    Frames are decoded at reduced scale where the format
+                    allows it, and recent frames are cached so that paging
+                    back and forth between files is immediate.
 
 AUTHOR:         Benjamin Whitsett
-MODIFIED:       Mar. 26, 2024
+MODIFIED:       Oct. 19, 2026
 """
 
 import matplotlib as mpl
@@ -16,8 +19,13 @@ import matplotlib.pyplot as plt
 from PIL import Image, ImageOps
 import os
 import math
+import zlib
+from collections import OrderedDict
 
 POPUP_NAME = 'Image Preview'
+PREVIEW_PIXELS = 500000   # approximate pixel budget for a displayed frame
+FRAME_CACHE_SIZE = 16     # number of recent decoded frames kept in memory
+FRAME_KEY_BYTES = 65536   # leading bytes hashed to recognize a re-shown file
 
 # custom pause that doesn't move the window to the front (https://stackoverflow.com/a/45734500)
 def customPltPause(interval):
@@ -31,8 +39,15 @@ def customPltPause(interval):
             canvas.start_event_loop(interval)
             return
 
+# identify a previewed file by name, size, and leading bytes (copies get fresh timestamps)
+def frameKey(path):
+    with open(path, 'rb') as fin:
+        head = fin.read(FRAME_KEY_BYTES)
+    return (os.path.split(path)[1], os.path.getsize(path), zlib.crc32(head))
+
 # expects `preview` dir to exist in the source directory,
 #  returns None if not (or no valid images)
+frameCache = OrderedDict() # recently decoded frames, least recent first
 def getImage():
     try:
         x = os.listdir('preview') # exception if DNE
@@ -48,29 +63,50 @@ def getImage():
     except Exception:
         return None
     
-    # open and manage size of image
-    img = Image.open(path)
-    imgTransp = ImageOps.exif_transpose(img)
-    img.close()
-    k = 2**round(math.ceil(math.log2(imgTransp.width * imgTransp.height / 500000)/2))
-    k = max(1, k)
-    imgTransp = imgTransp.resize((imgTransp.width//k, imgTransp.height//k))
+    # reuse the decoded frame if this file was shown recently
+    key = frameKey(path)
+    if key in frameCache:
+        frameCache.move_to_end(key)
+        os.remove(path)
+        return frameCache[key]
+    
+    # open and manage size of image, decoding at reduced scale before transposing
+    with Image.open(path) as img:
+        k = 2**round(math.ceil(math.log2(img.width * img.height / PREVIEW_PIXELS)/2))
+        k = max(1, k)
+        targetSize = (max(1, img.width//k), max(1, img.height//k))
+        img.draft(img.mode, targetSize) # JPEG decodes at 1/2, 1/4, or 1/8 scale; no-op otherwise
+        imgSmall = img.reduce(img.width // targetSize[0]) if img.width // targetSize[0] > 1 else img
+        if imgSmall.size != targetSize:
+            imgSmall = imgSmall.resize(targetSize)
+        imgTransp = ImageOps.exif_transpose(imgSmall)
     os.remove(path)
+    
+    # remember the frame, dropping the least recently shown one
+    frameCache[key] = imgTransp
+    while len(frameCache) > FRAME_CACHE_SIZE:
+        frameCache.popitem(last=False)
     return imgTransp
 
 
+# display the next image, reusing the same AxesImage after the first frame
+axImg = None
 def waitAndUpdate():
+    global axImg
     while (img := getImage()) is None:
         customPltPause(0.1)
         if not plt.fignum_exists(POPUP_NAME):
             return False
     
-    ax.clear()
-    ax.imshow(img, extent=(0,img.width,0,img.height))
+    if axImg is None:
+        axImg = ax.imshow(img, extent=(0,img.width,0,img.height))
+        ax.set_axis_off()
+        fig.tight_layout()
+    else:
+        axImg.set_data(img)
+        axImg.set_extent((0,img.width,0,img.height))
     ax.set_xlim(0, img.width)
     ax.set_ylim(0, img.height)
-    ax.set_axis_off()
-    fig.tight_layout()
     
     customPltPause(0.01)
     return plt.fignum_exists(POPUP_NAME)